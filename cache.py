@@ -1,7 +1,7 @@
 """
 Redis cache utilities for ChunkVault
 """
-import json
+import orjson
 import redis
 import os
 from typing import Any, Optional, Dict, List
@@ -9,20 +9,28 @@ from datetime import timedelta
 
 # Redis configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+redis_client = redis.from_url(REDIS_URL, decode_responses=True, max_connections=64)
+# Separate client for binary chunk payloads: decode_responses=True would
+# corrupt raw bytes by forcing them through UTF-8 decoding
+redis_bytes_client = redis.from_url(REDIS_URL, decode_responses=False, max_connections=64)
 
 class CacheManager:
-    """Redis cache manager for ChunkVault"""
-    
-    def __init__(self):
-        self.redis_client = redis_client
+    """Redis cache manager for ChunkVault
+
+    Clients default to the module-level pools; tests inject their own
+    (e.g. fakeredis) instead of monkey-patching the globals.
+    """
+
+    def __init__(self, client=None, bytes_client=None):
+        self.redis_client = client if client is not None else redis_client
+        self.redis_bytes_client = bytes_client if bytes_client is not None else redis_bytes_client
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
             value = self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             print(f"Cache get error for key {key}: {e}")
@@ -31,7 +39,8 @@ class CacheManager:
     def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """Set value in cache with optional expiration"""
         try:
-            serialized_value = json.dumps(value, default=str)
+            # orjson serializes datetimes natively; default=str covers the rest
+            serialized_value = orjson.dumps(value, default=str)
             if expire:
                 return self.redis_client.setex(key, expire, serialized_value)
             else:
@@ -56,18 +65,38 @@ class CacheManager:
             print(f"Cache exists error for key {key}: {e}")
             return False
     
-    def get_user_files(self, user_id: str) -> Optional[List[Dict]]:
-        """Get cached user files"""
-        return self.get(f"user_files:{user_id}")
-    
-    def set_user_files(self, user_id: str, files: List[Dict], expire: int = 300) -> bool:
-        """Cache user files for 5 minutes"""
-        return self.set(f"user_files:{user_id}", files, expire)
-    
+    def get_user_files_json(self, user_id: str) -> Optional[str]:
+        """Get cached user files as a raw JSON array"""
+        try:
+            return self.redis_client.get(f"user_files:{user_id}")
+        except Exception as e:
+            print(f"Cache get user files error for {user_id}: {e}")
+            return None
+
+    def set_user_files_json(self, user_id: str, payload: str, expire: int = 300) -> bool:
+        """Cache the raw user files JSON for 5 minutes"""
+        try:
+            return self.redis_client.setex(f"user_files:{user_id}", expire, payload)
+        except Exception as e:
+            print(f"Cache set user files error for {user_id}: {e}")
+            return False
+
     def invalidate_user_files(self, user_id: str) -> bool:
         """Invalidate user files cache"""
         return self.delete(f"user_files:{user_id}")
     
+    def get_auth_user(self, user_id: str) -> Optional[Dict]:
+        """Get cached authenticated user"""
+        return self.get(f"auth_user:{user_id}")
+
+    def set_auth_user(self, user_id: str, user: Dict, expire: int = 60) -> bool:
+        """Cache authenticated user for 1 minute"""
+        return self.set(f"auth_user:{user_id}", user, expire)
+
+    def invalidate_auth_user(self, user_id: str) -> bool:
+        """Invalidate authenticated user cache"""
+        return self.delete(f"auth_user:{user_id}")
+
     def get_file_metadata(self, file_id: str) -> Optional[Dict]:
         """Get cached file metadata"""
         return self.get(f"file_metadata:{file_id}")
@@ -97,24 +126,39 @@ class CacheManager:
         return self.set("storage_nodes_health", health, expire)
     
     def get_chunk_data(self, chunk_id: str) -> Optional[bytes]:
-        """Get cached chunk data"""
+        """Get cached chunk data as raw bytes"""
         try:
-            return self.redis_client.get(f"chunk_data:{chunk_id}")
+            return self.redis_bytes_client.get(f"chunk_data:{chunk_id}")
         except Exception as e:
             print(f"Cache get chunk data error for {chunk_id}: {e}")
             return None
-    
+
+    def get_chunk_data_many(self, chunk_ids: List[str]) -> Dict[str, Optional[bytes]]:
+        """Batch-fetch cached chunk data with a single MGET round-trip"""
+        if not chunk_ids:
+            return {}
+        try:
+            values = self.redis_bytes_client.mget([f"chunk_data:{chunk_id}" for chunk_id in chunk_ids])
+            return dict(zip(chunk_ids, values))
+        except Exception as e:
+            print(f"Cache mget chunk data error: {e}")
+            return {chunk_id: None for chunk_id in chunk_ids}
+
     def set_chunk_data(self, chunk_id: str, data: bytes, expire: int = 3600) -> bool:
         """Cache chunk data for 1 hour"""
         try:
-            return self.redis_client.setex(f"chunk_data:{chunk_id}", expire, data)
+            return self.redis_bytes_client.setex(f"chunk_data:{chunk_id}", expire, data)
         except Exception as e:
             print(f"Cache set chunk data error for {chunk_id}: {e}")
             return False
-    
+
     def invalidate_chunk_data(self, chunk_id: str) -> bool:
         """Invalidate chunk data cache"""
-        return self.delete(f"chunk_data:{chunk_id}")
+        try:
+            return bool(self.redis_bytes_client.delete(f"chunk_data:{chunk_id}"))
+        except Exception as e:
+            print(f"Cache delete chunk data error for {chunk_id}: {e}")
+            return False
     
     def get_share_info(self, share_token: str) -> Optional[Dict]:
         """Get cached share information"""
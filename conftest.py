@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures for ChunkVault
+"""
+import pytest
+from passlib.context import CryptContext
+
+import app
+
+@pytest.fixture(autouse=True, scope="session")
+def fast_password_hashing():
+    """Swap the production password hasher for a fast one during tests
+
+    argon2/bcrypt are deliberately slow, and every register/login in the
+    suite pays that cost — typically the single biggest test-time sink.
+    Tests only need hashes to round-trip, so plaintext is enough.
+    """
+    original = app.pwd_context
+    app.pwd_context = CryptContext(schemes=["plaintext"])
+    yield
+    app.pwd_context = original
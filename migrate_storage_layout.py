@@ -0,0 +1,34 @@
+"""
+One-shot migration: re-shard chunk storage from chunk_id[:2]/chunk_id
+to the two-level chunk_id[:2]/chunk_id[2:4]/chunk_id layout.
+
+Run once per storage node with the node stopped:
+
+    STORAGE_PATH=./storage python migrate_storage_layout.py
+
+Safe to re-run; already-migrated chunks are left in place.
+"""
+import os
+from pathlib import Path
+
+STORAGE_PATH = Path(os.getenv("STORAGE_PATH", "./storage"))
+
+def migrate():
+    moved = 0
+    for shard in sorted(STORAGE_PATH.iterdir()):
+        if not shard.is_dir():
+            continue
+        for entry in sorted(shard.iterdir()):
+            # Old-layout chunks sit directly under the first-level shard
+            if not entry.is_file():
+                continue
+            chunk_id = entry.name
+            target_dir = shard / chunk_id[2:4]
+            target_dir.mkdir(exist_ok=True)
+            os.rename(entry, target_dir / chunk_id)
+            moved += 1
+    return moved
+
+if __name__ == "__main__":
+    count = migrate()
+    print(f"Migrated {count} chunks under {STORAGE_PATH.absolute()}")
@@ -3,9 +3,14 @@ ChunkVault Web Interface
 Professional file storage and management system
 """
 import streamlit as st
-import requests
+import pandas as pd
+import httpx
 import io
 import os
+import math
+import tempfile
+import asyncio
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import time
@@ -27,7 +32,7 @@ st.set_page_config(
 )
 
 # Custom CSS for professional look
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -91,7 +96,15 @@ st.markdown("""
         background-color: #eff6ff;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _inject_css():
+    # Cached so reruns replay the recorded markdown element instead of
+    # re-serializing the whole style block on every interaction
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+_inject_css()
 
 # Initialize session state
 if 'access_token' not in st.session_state:
@@ -101,24 +114,42 @@ if 'user_id' not in st.session_state:
 if 'username' not in st.session_state:
     st.session_state.username = None
 
+def get_session() -> httpx.Client:
+    """Shared HTTP client, one per browser session
+
+    Streamlit reruns the whole script on every interaction; pooled
+    keep-alive connections spare each rerun the TCP handshake that
+    one-shot calls pay per request. Limits live on the transport because
+    client-level settings are ignored once a custom transport is passed.
+    """
+    if 'http_session' not in st.session_state:
+        session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                retries=2,
+                limits=httpx.Limits(max_keepalive_connections=32)
+            ),
+            timeout=30.0
+        )
+        if st.session_state.access_token:
+            session.headers["Authorization"] = f"Bearer {st.session_state.access_token}"
+        st.session_state.http_session = session
+    return st.session_state.http_session
+
 def make_api_request(method: str, endpoint: str, data: Dict = None, files: Dict = None) -> Optional[Dict]:
     """Make API request with authentication"""
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    
-    if st.session_state.access_token:
-        headers["Authorization"] = f"Bearer {st.session_state.access_token}"
-    
+    session = get_session()
+
     try:
         if method == "GET":
-            response = requests.get(url, headers=headers)
+            response = session.get(url)
         elif method == "POST":
             if files:
-                response = requests.post(url, headers=headers, files=files)
+                response = session.post(url, files=files)
             else:
-                response = requests.post(url, headers=headers, json=data)
+                response = session.post(url, json=data)
         elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
+            response = session.delete(url)
         
         if response.status_code == 200:
             return response.json()
@@ -138,6 +169,8 @@ def login_user(username: str, password: str) -> bool:
         st.session_state.access_token = response["access_token"]
         st.session_state.user_id = response["user_id"]
         st.session_state.username = username
+        # Auth header is set once on the session rather than per request
+        get_session().headers["Authorization"] = f"Bearer {response['access_token']}"
         return True
     return False
 
@@ -152,36 +185,99 @@ def logout_user():
     st.session_state.access_token = None
     st.session_state.user_id = None
     st.session_state.username = None
+    get_session().headers.pop("Authorization", None)
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+@lru_cache(maxsize=4096)
 def format_file_size(size_bytes: int) -> str:
-    """Format file size in human readable format"""
-    if size_bytes == 0:
+    """Format file size in human readable format
+
+    Called for every metric and table row on every rerun, so the unit is
+    picked directly from log2 and repeat sizes hit the LRU cache.
+    """
+    if size_bytes <= 0:
         return "0 B"
-    
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f} {size_names[i]}"
+    i = min(int(math.log2(size_bytes)) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * i)):.1f} {_SIZE_UNITS[i]}"
 
+@st.cache_data(ttl=10, show_spinner=False)
 def get_storage_stats() -> Dict:
-    """Get storage node statistics"""
-    stats = {"total_size": 0, "total_chunks": 0, "available_space": 0}
-    
-    for node_url in STORAGE_NODES:
-        try:
-            response = requests.get(f"{node_url}/storage/stats", timeout=5)
-            if response.status_code == 200:
-                node_stats = response.json()["storage_stats"]
-                stats["total_size"] += node_stats["total_size"]
-                stats["total_chunks"] += node_stats["chunk_count"]
-                stats["available_space"] += node_stats["available_space"]
-        except:
-            continue
-    
-    return stats
+    """Get aggregated storage statistics, cached briefly across reruns
+
+    The coordinator fans out to the nodes server-side, so the UI pays a
+    single round-trip instead of one per node.
+    """
+    try:
+        response = get_session().get(f"{API_BASE_URL}/storage/stats", timeout=5)
+        if response.status_code == 200:
+            return response.json()
+    except:
+        pass
+    return {"total_size": 0, "total_chunks": 0, "available_space": 0}
+
+@st.fragment
+def _render_storage_metrics(stats: Dict):
+    """Render the shared four-column storage metrics row
+
+    Used by both the anonymous landing view and the Analytics tab; as a
+    fragment, interactions inside it rerun only this subtree instead of
+    the whole script.
+    """
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Storage Nodes", len(STORAGE_NODES))
+    with col2:
+        st.metric("Total Storage", format_file_size(stats["total_size"]))
+    with col3:
+        st.metric("Available Space", format_file_size(stats["available_space"]))
+    with col4:
+        st.metric("Total Chunks", stats["total_chunks"])
+
+@st.cache_data(ttl=15, show_spinner=False)
+def get_node_health() -> List[Optional[bool]]:
+    """Probe every storage node's /health with bounded async fan-out
+
+    One event loop and one connection pool replace a thread per node, so
+    the cost stays flat as the node list grows; the semaphore caps
+    in-flight probes. Cached so revisiting Settings doesn't re-poll on
+    every rerun.
+    """
+    async def probe_all() -> List[Optional[bool]]:
+        semaphore = asyncio.Semaphore(16)
+
+        async def check(client: httpx.AsyncClient, node_url: str) -> Optional[bool]:
+            async with semaphore:
+                try:
+                    response = await client.get(f"{node_url}/health", timeout=2.0)
+                    return response.status_code == 200
+                except:
+                    return None
+
+        async with httpx.AsyncClient() as client:
+            return list(await asyncio.gather(*[check(client, node) for node in STORAGE_NODES]))
+
+    return asyncio.run(probe_all())
+
+@st.cache_data(ttl=5, show_spinner=False)
+def fetch_files(token: str, cursor: Optional[str] = None) -> Optional[Dict]:
+    """Fetch one page of the user's files, cached per token and cursor
+
+    Streamlit reruns the script on every widget interaction; without the
+    TTL cache each keypress elsewhere on the page re-fires the /files call.
+    """
+    endpoint = f"/files?cursor={cursor}" if cursor else "/files"
+    return make_api_request("GET", endpoint)
+
+@st.cache_data(ttl=10, show_spinner=False)
+def fetch_analytics(token: str) -> Optional[Dict]:
+    """Fetch server-side file analytics, cached per access token"""
+    return make_api_request("GET", "/files/analytics")
+
+def invalidate_files():
+    """Drop the cached file listing after a mutation (upload, delete)"""
+    fetch_files.clear()
+    fetch_analytics.clear()
 
 # Main App
 def main():
@@ -234,22 +330,10 @@ def main():
         
         # Show system overview for non-authenticated users
         st.markdown("## System Overview")
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Storage Nodes", len(STORAGE_NODES))
-        
-        with col2:
-            stats = get_storage_stats()
-            st.metric("Total Storage", format_file_size(stats["total_size"]))
-        
-        with col3:
-            st.metric("Available Space", format_file_size(stats["available_space"]))
-        
-        with col4:
-            st.metric("Total Chunks", stats["total_chunks"])
-        
+
+        stats = get_storage_stats()
+        _render_storage_metrics(stats)
+
         # Storage distribution
         if stats["total_size"] > 0:
             st.markdown("### Storage Distribution")
@@ -269,14 +353,23 @@ def main():
     with tab1:
         st.markdown("## Your Files")
         
-        # Refresh button
+        # Refresh drops the caches; the rerun it triggers refetches
         if st.button("Refresh", type="secondary"):
-            st.rerun()
-        
-        # Get user files
-        files = make_api_request("GET", "/files")
-        
-        if files:
+            fetch_files.clear()
+            get_storage_stats.clear()
+            st.session_state.files_cursors = [None]
+
+        # Fetch the pages loaded so far; "Load more" appends a cursor
+        if 'files_cursors' not in st.session_state:
+            st.session_state.files_cursors = [None]
+        pages = [
+            fetch_files(st.session_state.access_token, page_cursor)
+            for page_cursor in st.session_state.files_cursors
+        ]
+        files = [file for page in pages if page for file in page["files"]]
+        next_cursor = pages[-1]["next_cursor"] if pages and pages[-1] else None
+
+        if pages[0] is not None:
             if len(files) == 0:
                 st.info("No files found. Upload your first file!")
             else:
@@ -285,47 +378,64 @@ def main():
                 st.metric("Total Files", len(files))
                 st.metric("Total Size", format_file_size(total_size))
                 
-                # Files list
-                for file in files:
-                    with st.container():
-                        col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
-                        
-                        with col1:
-                            st.write(f"**{file['filename']}**")
-                            st.caption(f"Uploaded: {datetime.fromisoformat(file['created_at'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M')}")
-                        
-                        with col2:
-                            st.write(format_file_size(file['size']))
-                        
-                        with col3:
-                            status_color = "🟢" if file['status'] == 'completed' else "🟡" if file['status'] == 'uploading' else "🔴"
-                            st.write(f"{status_color} {file['status']}")
-                        
-                        with col4:
-                            if st.button("Download", key=f"download_{file['id']}"):
-                                with st.spinner("Downloading..."):
-                                    response = requests.get(
-                                        f"{API_BASE_URL}/files/{file['id']}/download",
-                                        headers={"Authorization": f"Bearer {st.session_state.access_token}"}
-                                    )
+                # One dataframe instead of 5 widgets per file: the browser
+                # receives a single table payload however long the list is
+                df = pd.DataFrame(files)
+                display = pd.DataFrame({
+                    "Filename": df["filename"],
+                    "Size": df["size"].map(format_file_size),
+                    "Status": df["status"],
+                    "Uploaded": pd.to_datetime(df["created_at"]).dt.strftime("%Y-%m-%d %H:%M"),
+                })
+                event = st.dataframe(
+                    display,
+                    use_container_width=True,
+                    hide_index=True,
+                    on_select="rerun",
+                    selection_mode="single-row"
+                )
+
+                if event.selection.rows:
+                    file = files[event.selection.rows[0]]
+                    col1, col2 = st.columns(2)
+
+                    with col1:
+                        if st.button("Download", key=f"download_{file['id']}"):
+                            with st.spinner("Downloading..."):
+                                with get_session().stream(
+                                    "GET", f"{API_BASE_URL}/files/{file['id']}/download"
+                                ) as response:
                                     if response.status_code == 200:
-                                        st.download_button(
-                                            "Save File",
-                                            response.content,
-                                            file_name=file['filename'],
-                                            mime=file['mime_type']
-                                        )
-                        
-                        with col5:
-                            if st.button("Share", key=f"share_{file['id']}"):
-                                with st.spinner("Creating share link..."):
-                                    share_data = {"expires_in_hours": 24}
-                                    share_response = make_api_request("POST", f"/files/{file['id']}/share", share_data)
-                                    if share_response:
-                                        st.success(f"Share link created: {share_response['share_url']}")
-                                        st.code(share_response['share_url'])
-                        
-                        st.divider()
+                                        # Spool to a temp file in 1MB blocks:
+                                        # large files spill to disk instead of
+                                        # sitting whole in the app's heap
+                                        buffer = tempfile.SpooledTemporaryFile(max_size=1 << 24)
+                                        for block in response.iter_bytes(1 << 20):
+                                            buffer.write(block)
+                                        buffer.seek(0)
+                                    else:
+                                        buffer = None
+                                if buffer is not None:
+                                    st.download_button(
+                                        "Save File",
+                                        buffer,
+                                        file_name=file['filename'],
+                                        mime=file['mime_type']
+                                    )
+
+                    with col2:
+                        if st.button("Share", key=f"share_{file['id']}"):
+                            with st.spinner("Creating share link..."):
+                                share_data = {"expires_in_hours": 24}
+                                share_response = make_api_request("POST", f"/files/{file['id']}/share", share_data)
+                                if share_response:
+                                    st.success(f"Share link created: {share_response['share_url']}")
+                                    st.code(share_response['share_url'])
+
+                if next_cursor:
+                    if st.button("Load more"):
+                        st.session_state.files_cursors.append(next_cursor)
+                        st.rerun()
         else:
             st.error("Failed to load files.")
     
@@ -346,13 +456,19 @@ def main():
             
             if st.button("Upload to ChunkVault", type="primary"):
                 with st.spinner("Uploading file..."):
-                    # Prepare file for upload
+                    # Hand httpx the file object itself: it streams the
+                    # multipart body in chunks, overlapping disk reads with
+                    # the network send instead of building the body in RAM
+                    uploaded_file.seek(0)
                     files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                     
                     # Upload file
                     response = make_api_request("POST", "/files/upload", files=files)
                     
                     if response:
+                        # The cached listing is stale the moment the upload
+                        # lands; drop it so the Files tab shows the new file
+                        invalidate_files()
                         st.success("File uploaded successfully!")
                         st.json(response)
                     else:
@@ -362,48 +478,27 @@ def main():
         st.markdown("## Analytics")
         
         # System metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Storage Nodes", len(STORAGE_NODES))
-        
-        with col2:
-            stats = get_storage_stats()
-            st.metric("Total Storage", format_file_size(stats["total_size"]))
-        
-        with col3:
-            st.metric("Available Space", format_file_size(stats["available_space"]))
-        
-        with col4:
-            st.metric("Total Chunks", stats["total_chunks"])
-        
-        # User files analytics
-        files = make_api_request("GET", "/files")
-        if files:
-            # File size distribution
-            file_sizes = [file["size"] for file in files]
-            if file_sizes:
-                st.markdown("### File Size Distribution")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Smallest File", format_file_size(min(file_sizes)))
-                with col2:
-                    st.metric("Largest File", format_file_size(max(file_sizes)))
-                with col3:
-                    avg_size = sum(file_sizes) / len(file_sizes)
-                    st.metric("Average Size", format_file_size(int(avg_size)))
-            
-            # File types
-            file_types = {}
-            for file in files:
-                mime_type = file["mime_type"]
-                file_type = mime_type.split('/')[0] if '/' in mime_type else 'unknown'
-                file_types[file_type] = file_types.get(file_type, 0) + 1
-            
-            if file_types:
+        _render_storage_metrics(get_storage_stats())
+
+        # User files analytics, aggregated server-side: one small JSON blob
+        # instead of the full file list
+        analytics = fetch_analytics(st.session_state.access_token)
+        if analytics and analytics["count"]:
+            st.markdown("### File Size Distribution")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Smallest File", format_file_size(int(analytics["min_size"])))
+            with col2:
+                st.metric("Largest File", format_file_size(int(analytics["max_size"])))
+            with col3:
+                st.metric("Average Size", format_file_size(int(analytics["avg_size"])))
+
+            by_mime = pd.Series(analytics["by_mime"])
+            if not by_mime.empty:
+                # Collapse full mime types to their top-level family
+                file_types = by_mime.groupby(by_mime.index.str.split("/").str[0]).sum()
                 st.markdown("### File Types Distribution")
-                for file_type, count in file_types.items():
-                    st.write(f"**{file_type}**: {count} files")
+                st.bar_chart(file_types)
     
     with tab4:
         st.markdown("## Settings")
@@ -413,15 +508,13 @@ def main():
         st.info(f"**Storage Nodes:** {len(STORAGE_NODES)}")
         
         st.markdown("### Storage Nodes Status")
-        for i, node_url in enumerate(STORAGE_NODES, 1):
-            try:
-                response = requests.get(f"{node_url}/health", timeout=5)
-                if response.status_code == 200:
-                    st.success(f"Node {i}: Healthy")
-                else:
-                    st.error(f"Node {i}: Unhealthy")
-            except:
+        for i, healthy in enumerate(get_node_health(), 1):
+            if healthy:
+                st.success(f"Node {i}: Healthy")
+            elif healthy is None:
                 st.error(f"Node {i}: Offline")
+            else:
+                st.error(f"Node {i}: Unhealthy")
         
         st.markdown("### Account Management")
         if st.button("Delete Account", type="secondary"):
@@ -3,60 +3,80 @@ Comprehensive test suite for ChunkVault
 """
 import pytest
 import asyncio
+import hashlib
 import os
 import tempfile
 import shutil
 from pathlib import Path
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app import app, Base, get_db, get_current_user
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from datetime import datetime, timedelta
+from freezegun import freeze_time
+from app import app, Base, get_db, get_current_user, STORAGE_NODES
 from cache import CacheManager
-import redis
+import fakeredis
+import httpx
 
 # Test configuration
-TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test_chunkvault.db")
-TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/1")
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
 
 @pytest.fixture(scope="session")
 def test_engine():
-    """Create test database engine"""
-    engine = create_engine(TEST_DATABASE_URL)
-    Base.metadata.create_all(bind=engine)
+    """Create test database engine
+
+    In-memory SQLite on a StaticPool: every session shares the single
+    connection (and therefore the single in-memory database), and tests
+    never touch disk.
+    """
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def drop_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    asyncio.run(create_tables())
     yield engine
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(drop_tables())
 
 @pytest.fixture(scope="session")
 def test_session(test_engine):
-    """Create test database session"""
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-    session = SessionLocal()
-    yield session
-    session.close()
+    """Create test database session factory"""
+    return async_sessionmaker(test_engine, autoflush=False, expire_on_commit=False)
 
 @pytest.fixture(scope="session")
 def test_redis():
-    """Create test Redis client"""
-    redis_client = redis.from_url(TEST_REDIS_URL)
+    """In-process fake Redis: no external server, per-worker by nature"""
+    server = fakeredis.FakeServer()
+    redis_client = fakeredis.FakeStrictRedis(server=server, decode_responses=True)
     yield redis_client
     redis_client.flushdb()
 
 @pytest.fixture(scope="session")
 def test_cache(test_redis):
-    """Create test cache manager"""
-    return CacheManager()
+    """Create test cache manager backed by the fake Redis"""
+    bytes_client = fakeredis.FakeStrictRedis(
+        server=test_redis.connection_pool.connection_kwargs["server"],
+        decode_responses=False
+    )
+    return CacheManager(client=test_redis, bytes_client=bytes_client)
 
 @pytest.fixture(scope="session")
-def client(test_engine):
+def client(test_session):
     """Create test client"""
-    def override_get_db():
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-        session = SessionLocal()
-        try:
+    async def override_get_db():
+        async with test_session() as session:
             yield session
-        finally:
-            session.close()
-    
+
     app.dependency_overrides[get_db] = override_get_db
     client = TestClient(app)
     yield client
@@ -85,6 +105,36 @@ def auth_headers(client):
     
     return {"Authorization": f"Bearer {token}"}
 
+@pytest.fixture(scope="session")
+def storage_nodes_required():
+    """Skip tests that need live storage nodes
+
+    Downloads stream real chunk bytes back from the nodes; without them
+    an upload records a failed file and there is nothing to fetch. Most
+    of the suite runs self-contained, so missing nodes skip rather than
+    fail these end-to-end tests.
+    """
+    for node_url in STORAGE_NODES:
+        try:
+            if httpx.get(f"{node_url}/health", timeout=2).status_code == 200:
+                continue
+        except Exception:
+            pass
+        pytest.skip(f"requires live storage nodes ({node_url} unreachable)")
+
+def download_digest(client, url, headers=None):
+    """Stream a download and fold it into a blake2b digest
+
+    Keeps memory constant regardless of payload size, so the same
+    assertion works for small fixtures and large-file regressions alike.
+    """
+    hasher = hashlib.blake2b()
+    with client.stream("GET", url, headers=headers) as response:
+        assert response.status_code == 200
+        for block in response.iter_bytes(1 << 20):
+            hasher.update(block)
+    return hasher.hexdigest()
+
 class TestAuthentication:
     """Test authentication endpoints"""
     
@@ -164,10 +214,11 @@ class TestFileOperations:
         response = client.get("/files", headers=auth_headers)
         assert response.status_code == 200
         
-        files = response.json()
-        assert isinstance(files, list)
+        data = response.json()
+        assert isinstance(data["files"], list)
+        assert "next_cursor" in data
     
-    def test_download_file(self, client, auth_headers):
+    def test_download_file(self, client, auth_headers, storage_nodes_required):
         """Test file download"""
         # Upload a file first
         test_content = b"Download test content"
@@ -175,10 +226,9 @@ class TestFileOperations:
         upload_response = client.post("/files/upload", files=files, headers=auth_headers)
         file_id = upload_response.json()["file_id"]
         
-        # Download the file
-        response = client.get(f"/files/{file_id}/download", headers=auth_headers)
-        assert response.status_code == 200
-        assert response.content == test_content
+        # Download the file, comparing digests instead of full bodies
+        digest = download_digest(client, f"/files/{file_id}/download", headers=auth_headers)
+        assert digest == hashlib.blake2b(test_content).hexdigest()
     
     def test_create_share_link(self, client, auth_headers):
         """Test share link creation"""
@@ -197,7 +247,7 @@ class TestFileOperations:
         assert "share_token" in data
         assert "share_url" in data
     
-    def test_download_shared_file(self, client, auth_headers):
+    def test_download_shared_file(self, client, auth_headers, storage_nodes_required):
         """Test downloading shared file"""
         # Upload a file first
         test_content = b"Shared file content"
@@ -210,10 +260,9 @@ class TestFileOperations:
         share_response = client.post(f"/files/{file_id}/share", json=share_data, headers=auth_headers)
         share_token = share_response.json()["share_token"]
         
-        # Download shared file
-        response = client.get(f"/share/{share_token}")
-        assert response.status_code == 200
-        assert response.content == test_content
+        # Download shared file, comparing digests instead of full bodies
+        digest = download_digest(client, f"/share/{share_token}")
+        assert digest == hashlib.blake2b(test_content).hexdigest()
 
 class TestCache:
     """Test Redis caching functionality"""
@@ -237,35 +286,29 @@ class TestCache:
         
         # Set with short expiration
         assert test_cache.set(key, value, expire=1) == True
-        
+
         # Should be available immediately
         assert test_cache.get(key) == value
-        
-        # Wait for expiration
-        import time
-        time.sleep(2)
-        
-        # Should be None after expiration
-        assert test_cache.get(key) is None
+
+        # Advance the clock past the TTL instead of sleeping for real;
+        # fakeredis reads time.time(), which freezegun patches
+        with freeze_time(datetime.now() + timedelta(seconds=2)):
+            assert test_cache.get(key) is None
     
     def test_cache_user_files(self, test_cache):
         """Test user files caching"""
         user_id = "test_user_123"
-        files = [
-            {"id": "file1", "name": "test1.txt"},
-            {"id": "file2", "name": "test2.txt"}
-        ]
-        
+        payload = '[{"id": "file1", "name": "test1.txt"}, {"id": "file2", "name": "test2.txt"}]'
+
         # Set user files
-        assert test_cache.set_user_files(user_id, files) == True
-        
+        assert test_cache.set_user_files_json(user_id, payload) == True
+
         # Get user files
-        retrieved = test_cache.get_user_files(user_id)
-        assert retrieved == files
-        
+        assert test_cache.get_user_files_json(user_id) == payload
+
         # Invalidate cache
         assert test_cache.invalidate_user_files(user_id) == True
-        assert test_cache.get_user_files(user_id) is None
+        assert test_cache.get_user_files_json(user_id) is None
 
 class TestHealthChecks:
     """Test health check endpoints"""